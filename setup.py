@@ -15,6 +15,12 @@ setup(
         "slither-analyzer",
         "ortools"
     ],
+    extras_require={
+        "benchmark": [
+            "web3",
+            "eth-tester[py-evm]"
+        ]
+    },
     license="GPL-3.0",
     long_description=long_description,
     long_description_content_type="text/markdown",
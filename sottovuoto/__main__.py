@@ -10,10 +10,12 @@ Typical usage example:
 """
 
 import argparse
+import json
 import logging
 from pathlib import Path
 import sys
-from sottovuoto.sottovuoto import Sottovuoto
+from sottovuoto.results import ResultsStore, file_hash
+from sottovuoto import client, sharding
 
 log = logging.getLogger("sottovuoto")
 log.setLevel(logging.INFO)
@@ -21,6 +23,10 @@ log.setLevel(logging.INFO)
 def main():
     """Entrypoint for the sottovuoto cli tool"""
 
+    # don't rely on slither's import to install a handler:
+    # the client and --merge don't load it
+    logging.basicConfig()
+
     parser = argparse.ArgumentParser(
         description="sottovuoto: a tight variable packing tool for solidity")
     group = parser.add_mutually_exclusive_group()
@@ -30,6 +36,61 @@ def main():
     group.add_argument("--folder",
                     help="the contracts folder: it will handle all .sol files",
                     default=None)
+    group.add_argument("--serve", metavar="SOCKET",
+                    help="keep the analysis resident behind this Unix socket",
+                    default=None)
+    group.add_argument("--merge", nargs="+", metavar="REPORT",
+                    help="merge the reports of the shards into --report "
+                    "(or stdout) and output their findings",
+                    default=None)
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="the number of worker processes used to solve "
+                        "the packing problems of each file",
+                        default=1)
+    parser.add_argument("--access-aware",
+                        help="prefer co-locating the state variables accessed "
+                        "by the same functions and estimate their gas savings",
+                        action="store_true")
+    parser.add_argument("--benchmark",
+                        help="measure the gas of the original and the suggested "
+                        "layouts on a local EVM (needs the benchmark extras)",
+                        action="store_true")
+    parser.add_argument("--db",
+                        help="record the results in this SQLite database "
+                        "and skip the files which didn't change since their "
+                        "last analysis",
+                        default=None)
+    parser.add_argument("--rescan", help="analyze the unchanged files too",
+                        action="store_true")
+    parser.add_argument("--max-memory", type=int,
+                        help="batch mode: recycle the worker process after "
+                        "the file which makes its own RSS exceed this many MB "
+                        "(checked between files, solver --jobs processes "
+                        "excluded)",
+                        default=None)
+    parser.add_argument("--max-files-per-worker", type=int,
+                        help="batch mode: recycle the worker process after "
+                        "this many files",
+                        default=None)
+    parser.add_argument("--connect", metavar="SOCKET",
+                        help="send the --contract (or its source from stdin, "
+                        "with --contract -) to the server listening on SOCKET",
+                        default=None)
+    parser.add_argument("--source-path",
+                        help="with --connect and --contract -, the path the "
+                        "source comes from, so its relative imports resolve",
+                        default=None)
+    parser.add_argument("--shard", type=sharding.parse_shard, metavar="i/N",
+                        help="only analyze the i-th of N shards of the files, "
+                        "balanced by their --durations or their size",
+                        default=None)
+    parser.add_argument("--durations", metavar="REPORT",
+                        help="balance the --shard with the durations of this "
+                        "previous (merged) report, the same on every node",
+                        default=None)
+    parser.add_argument("--report",
+                        help="write the findings to this JSON report",
+                        default=None)
     parser.add_argument("-d", "--debug", help="enable debug logs",
                         action="store_true")
 
@@ -38,21 +99,124 @@ def main():
     if args.debug:
         log.setLevel(logging.DEBUG)
 
+    if args.merge:
+        try:
+            report = sharding.merge_reports(args.merge)
+        except ValueError as exception:
+            log.error(exception)
+            sys.exit(1)
+        if args.report:
+            sharding.write_report(args.report, report)
+        else:
+            print(json.dumps(report, indent=2))
+        sharding.output_report(report)
+        return
+
+    if args.connect:
+        if not args.contract:
+            parser.error("--connect needs a --contract")
+        message = {"access_aware": args.access_aware}
+        if args.contract == "-":
+            message["source"] = sys.stdin.read()
+            if args.source_path:
+                message["path"] = str(Path(args.source_path).resolve())
+        else:
+            message["path"] = str(Path(args.contract).resolve())
+        try:
+            response = client.request(args.connect, message)
+        except OSError as exception:
+            log.error(f"no sottovuoto server is listening on {args.connect}: "
+                      f"{exception.strerror or exception}")
+            sys.exit(1)
+        print(json.dumps(response, indent=2))
+        sys.exit(1 if "error" in response else 0)
+
+    # imported here, so that the client doesn't load slither and the solver
+    from sottovuoto.batch import analyze_file, run_batch
+
+    options = {"jobs": args.jobs,
+               "access_aware": args.access_aware,
+               "benchmark": args.benchmark}
+
+    if args.serve:
+        from sottovuoto.server import serve
+        serve(args.serve, options)
+        return
+
     if args.contract:
         files_to_analyze = [args.contract]
     elif args.folder:
-        files_to_analyze = [
+        # sorted, so every shard sees the same files in the same order
+        files_to_analyze = sorted(
             str(file) for file in Path(args.folder).rglob('*.sol')
-            ]
+            )
     else:
         parser.print_help()
         sys.exit(1)
 
     log.debug(f"we are going to analyze these files: {files_to_analyze}")
 
-    for file in files_to_analyze:
-        sottovuoto = Sottovuoto(file)
-        sottovuoto.output(sottovuoto.analyze_packing(), "stdout")
+    store = ResultsStore(args.db) if args.db else None
+
+    # the paths relative to the scanned folder are the same on every checkout
+    scan_root = Path(args.folder) if args.folder else Path(args.contract).parent
+    scan_paths = {file: Path(file).relative_to(scan_root).as_posix()
+                  for file in files_to_analyze}
+
+    if args.shard:
+        shard_index, shard_count = args.shard
+        # a fixed snapshot, so that every node computes the same partition
+        durations = {}
+        if args.durations:
+            scan_durations = sharding.read_durations(args.durations)
+            durations = {file: scan_durations[scan_paths[file]]
+                         for file in files_to_analyze
+                         if scan_paths[file] in scan_durations}
+        files_to_analyze = sharding.partition(
+            files_to_analyze,
+            sharding.get_costs(files_to_analyze, durations),
+            shard_count)[shard_index - 1]
+        log.debug(f"shard {shard_index}/{shard_count}: {files_to_analyze}")
+
+    # the options which change the recorded findings
+    store_options = {"access_aware": args.access_aware}
+    content_hashes = {}
+    skipped_files = []
+    if store:
+        for file in list(files_to_analyze):
+            content_hashes[file] = file_hash(file)
+            if not args.rescan and \
+               store.is_unchanged(file, content_hashes[file], store_options):
+                log.info(f"{file} didn't change since its last analysis: skipped.")
+                files_to_analyze.remove(file)
+                skipped_files.append(file)
+
+    if args.max_memory or args.max_files_per_worker:
+        records = run_batch(files_to_analyze, options,
+                            args.max_files_per_worker, args.max_memory)
+    else:
+        records = ((file, analyze_file(file, options))
+                   for file in files_to_analyze)
+
+    analyzed_records = []
+    for file, record in records:
+        analyzed_records.append((file, record))
+        if store:
+            store.record(file, content_hashes[file], record["findings"],
+                         record["duration"], record["dependencies"], store_options)
+
+    # the skipped files are reported with their latest recorded findings
+    skipped_records = [(file, store.get_latest_record(file))
+                       for file in skipped_files]
+
+    if store:
+        store.close()
+
+    if args.report:
+        shard = f"{args.shard[0]}/{args.shard[1]}" if args.shard else None
+        sharding.write_report(args.report, sharding.make_report(
+            sorted(analyzed_records + skipped_records,
+                   key=lambda file_record: file_record[0]), shard, scan_paths))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+"""sottovuoto.Batch runs the analysis of many files with bounded memory
+
+Each file is analyzed by a worker process, which is recycled after
+a number of files or once its memory usage crosses a threshold, so
+the slither objects it accumulates are returned to the system.
+
+The memory threshold is a recycle threshold, not a hard limit: it is
+checked between files, against the worker's own RSS. The solver
+processes started with --jobs are not counted, they exit with each
+file's solve.
+
+Typical usage example:
+    for file, record in run_batch(files, options, max_files=50, max_memory=2048):
+        store.record(file, content_hash, record["findings"])
+
+"""
+
+import gc
+import logging
+import multiprocessing
+import queue
+import resource
+import sys
+import time
+from collections import OrderedDict
+from sottovuoto.sottovuoto import Sottovuoto
+from sottovuoto.exceptions import BenchmarkUnavailable
+
+log = logging.getLogger("sottovuoto")
+
+# the most base contracts' layouts a process keeps in memory
+LAYOUT_CACHE_SIZE = 10000
+
+# how often the parent process checks that its worker is still alive
+WORKER_POLL_SECONDS = 1
+
+class LayoutCache(OrderedDict):
+    """A dict which drops its least recently used entries past max_size.
+
+    Attributes:
+        max_size: the number of entries it keeps
+    """
+
+    def __init__(self, max_size):
+        """Initialize an empty cache.
+
+        Args:
+            max_size: the number of entries it keeps
+        """
+
+        super().__init__()
+        self.max_size = max_size
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+# the base contracts' layouts are shared by all the files a process analyzes
+LAYOUT_CACHE = LayoutCache(LAYOUT_CACHE_SIZE)
+
+def get_rss_mb():
+    """Measures the memory used by the current process.
+
+    Returns:
+        The resident set size, in MB
+    """
+
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        # ru_maxrss is the peak usage: KB on linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 1024
+
+def analyze_file(file, options, executor=None, path_alias=None):
+    """Analyzes a single file and outputs its results.
+
+    Args:
+        file: the file path
+        options: a dict with the "jobs", "access_aware" and "benchmark" options
+        executor: a resident pool of worker processes for the solver, or None
+        path_alias: the path file stands for, when it is a temporary copy
+
+    Returns:
+        A record dict with the findings, the analysis duration (in seconds)
+        and the content hash of each source file of the compilation
+    """
+
+    start = time.monotonic()
+    sottovuoto = Sottovuoto(file, options["jobs"], options["access_aware"],
+                            LAYOUT_CACHE, executor, path_alias)
+    analysis_output = sottovuoto.analyze_packing()
+    sottovuoto.output(analysis_output, "stdout")
+
+    if options["benchmark"] and sottovuoto.findings:
+        # imported here as it is an optional feature
+        from sottovuoto import benchmark
+        if not benchmark.get_reorders(analysis_output):
+            log.debug(f"{file}: no suggested layout to benchmark")
+        else:
+            try:
+                benchmark.output_benchmark(
+                    sottovuoto, benchmark.benchmark(sottovuoto, analysis_output))
+            except BenchmarkUnavailable as exception:
+                log.error(exception)
+
+    record = {"findings": sottovuoto.findings,
+              "gas_savings": sottovuoto.gas_savings,
+              "duration": time.monotonic() - start,
+              "dependencies": {path: content_hash for path, content_hash
+                               in sottovuoto.file_hashes.items()
+                               if content_hash is not None}}
+
+    # drop the slither objects before the next file
+    del analysis_output
+    sottovuoto.release()
+    gc.collect()
+
+    return record
+
+def _worker(files, results, options, max_files, max_memory, layouts):
+    """Analyzes files until the worker has to be recycled.
+
+    Args:
+        files: the files left to analyze
+        results: the queue to send the (file, record) tuples to
+        options: the analyze_file options
+        max_files: the number of files after which the worker is recycled, or None
+        max_memory: the worker's own RSS (in MB) above which it is recycled
+            after the current file, or None
+        layouts: the base contracts' layouts computed by the previous workers
+    """
+
+    LAYOUT_CACHE.update(layouts)
+
+    for count, file in enumerate(files, 1):
+        results.put((file, analyze_file(file, options)))
+
+        if max_files and count >= max_files:
+            break
+        if max_memory and get_rss_mb() >= max_memory:
+            log.debug(f"the worker uses {get_rss_mb():.0f} MB after {count} "
+                      "file(s): recycling it")
+            break
+
+    # no more results from this worker: hand its layouts over to the next one
+    results.put((None, dict(LAYOUT_CACHE)))
+
+def run_batch(files, options, max_files=None, max_memory=None):
+    """Analyzes the files on recycled worker processes.
+
+    A file which makes its worker crash (e.g. killed for using too much
+    memory) is reported and skipped. The base contracts' layouts are
+    passed on from each worker to the next one.
+
+    Args:
+        files: the list of file paths
+        options: the analyze_file options
+        max_files: the number of files after which a worker is recycled, or None
+        max_memory: the RSS (in MB) above which a worker is recycled, or None
+
+    Yields:
+        A (file, record) tuple for each analyzed file, in the files order
+    """
+
+    remaining = list(files)
+    while remaining:
+        results = multiprocessing.Queue()
+        worker = multiprocessing.Process(
+            target=_worker,
+            args=(remaining, results, options, max_files, max_memory,
+                  dict(LAYOUT_CACHE)))
+        worker.start()
+
+        analyzed = 0
+        while True:
+            try:
+                result = results.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                if worker.is_alive():
+                    continue
+                # the worker may have sent its last results right before exiting
+                try:
+                    result = results.get(timeout=WORKER_POLL_SECONDS)
+                except queue.Empty:
+                    # the worker died while analyzing a file
+                    log.error(f"the worker crashed (exit code {worker.exitcode}) "
+                              f"while analyzing {remaining[analyzed]}: skipped.")
+                    analyzed += 1
+                    break
+            file, record = result
+            if file is None:
+                LAYOUT_CACHE.update(record)
+                break
+            analyzed += 1
+            yield result
+
+        worker.join()
+        remaining = remaining[analyzed:]
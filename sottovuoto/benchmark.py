@@ -0,0 +1,276 @@
+"""sottovuoto.Benchmark measures the gas effect of the suggested layout
+
+It rewrites the analyzed contract with the suggested declaration
+order, compiles both versions and deploys them on an in-process
+EVM (no network) to measure the deployment gas and the gas of each
+public state-changing function.
+
+It needs the optional benchmark dependencies:
+    pip install .[benchmark]
+
+Typical usage example:
+    analysis_output = sottovuoto.analyze_packing()
+    gas_report = benchmark(sottovuoto, analysis_output)
+    output_benchmark(sottovuoto, gas_report)
+
+"""
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+from crytic_compile import CryticCompile
+from crytic_compile.platform.exceptions import InvalidCompilation
+from sottovuoto.exceptions import BenchmarkUnavailable
+
+log = logging.getLogger("sottovuoto")
+
+def get_reorders(analysis_output):
+    """Collects the declarations to reorder from the analysis output.
+
+    Only the state variables are reordered: the positional struct
+    constructors, e.g. S(1, "a"), would no longer match a new member
+    order, so the suggested struct layouts are left out.
+
+    Args:
+        analysis_output: the return value from Sottovuoto.analyze_packing
+
+    Returns:
+        A list of lists of variables, each one in the suggested order
+    """
+
+    (_, opt_structs), (_, new_slots_map) = analysis_output
+
+    reorders = []
+    for struct in opt_structs or []:
+        if hasattr(struct, 'opt_version'):
+            log.info(f"{struct.name}'s suggested order is not benchmarked: its "
+                     "positional constructors would assign the wrong members")
+    if new_slots_map:
+        reorders.append([var
+                         for slot in new_slots_map
+                         for var in new_slots_map[slot]])
+    return reorders
+
+def rewrite_source(file, reorders):
+    """Rewrites the declarations of file in the suggested order.
+
+    The suggested order of a group of declarations is written
+    at the positions the same declarations occupy in file.
+
+    Args:
+        file: the solidity file path
+        reorders: the return value from get_reorders
+
+    Returns:
+        The rewritten source code, as bytes
+    """
+
+    source = Path(file).read_bytes()
+    absolute_path = str(Path(file).resolve())
+
+    # the source mappings are byte offsets
+    def declaration(var):
+        start = var.source_mapping.start
+        return source[start:start + var.source_mapping.length]
+
+    replacements = []
+    for new_order in reorders:
+        new_order = [var for var in new_order
+                     if var.source_mapping.filename.absolute == absolute_path]
+        positions = sorted((var.source_mapping.start, var.source_mapping.length)
+                           for var in new_order)
+        for (start, length), var in zip(positions, new_order):
+            replacements.append((start, length, declaration(var)))
+
+    # replace from the end, so the previous offsets stay valid
+    for start, length, text in sorted(replacements, reverse=True):
+        source = source[:start] + text + source[start + length:]
+    return source
+
+def compile_contract(file, name):
+    """Compiles the file and extracts a contract from it.
+
+    Args:
+        file: the solidity file path
+        name: the contract name
+
+    Returns:
+        A tuple with the contract abi and its init bytecode
+
+    Raises:
+        BenchmarkUnavailable: the file doesn't compile, or the contract
+            can't be deployed on its own (e.g. it links external libraries)
+    """
+
+    try:
+        compilation = CryticCompile(file)
+    except InvalidCompilation as exception:
+        raise BenchmarkUnavailable(f"{file} doesn't compile: {exception}") from exception
+
+    for compilation_unit in compilation.compilation_units.values():
+        for source_unit in compilation_unit.source_units.values():
+            if name in source_unit.contracts_names:
+                bytecode = source_unit.bytecode_init(name)
+                try:
+                    # the unlinked libraries are left as __$...$__ placeholders
+                    bytes.fromhex(bytecode)
+                except ValueError as exception:
+                    raise BenchmarkUnavailable(
+                        f"{name} links external libraries.") from exception
+                return source_unit.abi(name), bytecode
+    raise BenchmarkUnavailable(f"{name} was not found in the {file} compilation.")
+
+def get_dummy_value(abi_input, accounts):
+    """Builds a non-zero argument for an abi input.
+
+    Args:
+        abi_input: the abi input description
+        accounts: the local EVM accounts
+
+    Returns:
+        A value of the abi input type
+    """
+
+    abi_type = abi_input["type"]
+    if abi_type.endswith("]"):
+        element = dict(abi_input, type=abi_type[:abi_type.rindex("[")])
+        length = abi_type[abi_type.rindex("[") + 1:-1]
+        return [get_dummy_value(element, accounts)] * (int(length) if length else 1)
+    if abi_type == "tuple":
+        return tuple(get_dummy_value(component, accounts)
+                     for component in abi_input["components"])
+    if abi_type.startswith(("uint", "int")):
+        return 1
+    if abi_type == "bool":
+        return True
+    if abi_type == "address":
+        return accounts[1]
+    if abi_type == "string":
+        return "a"
+    if abi_type == "bytes":
+        return b"\x01"
+    if abi_type.startswith("bytes"):
+        return b"\x01" * int(abi_type[len("bytes"):])
+    raise BenchmarkUnavailable(f"{abi_type} arguments are not supported.")
+
+def measure(abi, bytecode):
+    """Deploys a contract on a local EVM and measures its gas usage.
+
+    Every function is measured on a fresh deployment, so the
+    results don't depend on the order of the calls.
+
+    Args:
+        abi: the contract abi
+        bytecode: the contract init bytecode
+
+    Returns:
+        A dict with the deployment gas and a dict of the gas used
+        by each state-changing function (None if the call reverted)
+
+    Raises:
+        BenchmarkUnavailable: the benchmark dependencies are missing,
+            or the constructor reverted
+    """
+
+    try:
+        from eth_tester.exceptions import TransactionFailed
+        from web3 import Web3, EthereumTesterProvider
+        from web3.exceptions import ContractLogicError
+    except ImportError as exception:
+        raise BenchmarkUnavailable("the benchmark needs the optional dependencies: "
+                                   "pip install .[benchmark]") from exception
+
+    w3 = Web3(EthereumTesterProvider())
+    accounts = w3.eth.accounts
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    constructor_inputs = next((item["inputs"] for item in abi
+                               if item["type"] == "constructor"), [])
+    constructor_args = [get_dummy_value(abi_input, accounts)
+                        for abi_input in constructor_inputs]
+
+    def deploy():
+        try:
+            tx_hash = factory.constructor(*constructor_args) \
+                .transact({"from": accounts[0]})
+        except (ContractLogicError, TransactionFailed) as exception:
+            raise BenchmarkUnavailable("the constructor reverted with dummy "
+                                       f"arguments: {exception}") from exception
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        return w3.eth.contract(address=receipt.contractAddress, abi=abi), receipt.gasUsed
+
+    _, deployment_gas = deploy()
+
+    functions_gas = {}
+    for item in abi:
+        if item["type"] != "function" or \
+           item["stateMutability"] not in ("nonpayable", "payable"):
+            continue
+        signature = f"{item['name']}({','.join(i['type'] for i in item['inputs'])})"
+        contract, _ = deploy()
+        args = [get_dummy_value(abi_input, accounts) for abi_input in item["inputs"]]
+        try:
+            tx_hash = contract.get_function_by_signature(signature)(*args) \
+                .transact({"from": accounts[0]})
+            functions_gas[signature] = w3.eth.wait_for_transaction_receipt(tx_hash).gasUsed
+        except Exception as exception: # pylint: disable=broad-except
+            log.debug(f"{signature} reverted: {exception}")
+            functions_gas[signature] = None
+
+    return {"deployment": deployment_gas, "functions": functions_gas}
+
+def benchmark(sottovuoto, analysis_output):
+    """Measures the gas of the original and the suggested layouts.
+
+    Args:
+        sottovuoto: the Sottovuoto instance which produced analysis_output
+        analysis_output: the return value from sottovuoto.analyze_packing
+
+    Returns:
+        A dict with the "original" and "optimized" measures
+
+    Raises:
+        BenchmarkUnavailable: one of the versions can't be written,
+            compiled or deployed
+    """
+
+    name = sottovuoto.contract.name
+    original = measure(*compile_contract(sottovuoto.file, name))
+
+    # keep the rewritten file next to the original one,
+    # so its relative imports still resolve
+    try:
+        file_descriptor, rewritten_file = tempfile.mkstemp(
+            prefix=".sottovuoto-", suffix=".sol", dir=Path(sottovuoto.file).parent)
+    except OSError as exception:
+        raise BenchmarkUnavailable("can't write the rewritten contract next to "
+                                   f"{sottovuoto.file}: {exception}") from exception
+    try:
+        with os.fdopen(file_descriptor, "wb") as rewritten:
+            rewritten.write(rewrite_source(sottovuoto.file, get_reorders(analysis_output)))
+        optimized = measure(*compile_contract(rewritten_file, name))
+    finally:
+        os.remove(rewritten_file)
+
+    return {"original": original, "optimized": optimized}
+
+def output_benchmark(sottovuoto, gas_report):
+    """Outputs the results of the benchmark.
+
+    Args:
+        sottovuoto: the benchmarked Sottovuoto instance
+        gas_report: the return value from benchmark
+    """
+
+    original, optimized = gas_report["original"], gas_report["optimized"]
+    log.info(f"{sottovuoto.file} -> {sottovuoto.contract.name}'s gas benchmark "
+             "(original -> suggested layout):")
+    log.info(f"deployment: {original['deployment']} -> {optimized['deployment']} "
+             f"({optimized['deployment'] - original['deployment']:+})")
+    for signature, original_gas in original["functions"].items():
+        optimized_gas = optimized["functions"].get(signature)
+        if original_gas is None or optimized_gas is None:
+            log.info(f"{signature}: {original_gas} -> {optimized_gas}")
+            continue
+        log.info(f"{signature}: {original_gas} -> {optimized_gas} "
+                 f"({optimized_gas - original_gas:+})")
@@ -0,0 +1,36 @@
+"""sottovuoto.Client talks to a resident sottovuoto server
+
+It only depends on the standard library, so it starts fast:
+the heavy modules are loaded once by the server.
+
+The protocol is one JSON object per line, both ways. A request has
+either a "path" to analyze or the "source" text of a file (and the
+"path" it comes from, if any, so its imports can be resolved).
+
+Typical usage example:
+    response = request("/tmp/sottovuoto.sock", {"path": "/abs/example.sol"})
+    response["findings"]
+
+"""
+
+import json
+import socket
+
+def request(socket_path, message):
+    """Sends a request to the server and waits for its response.
+
+    Args:
+        socket_path: the server Unix socket path
+        message: the request dict
+
+    Returns:
+        The response dict, with the "findings", the "gas_savings" and
+        the "duration" of the analysis, or an "error"
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        with connection.makefile("rwb") as stream:
+            stream.write(json.dumps(message).encode() + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
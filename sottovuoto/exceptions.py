@@ -1,8 +1,9 @@
 """sottovuoto.Exceptions contains common exceptions
 
-It covers two scenarios: 
+It covers three scenarios: 
     NoContractsFound: no contracts were found in the input file
     NoVarsFound: no variables were found in the contract(s)
+    BenchmarkUnavailable: the gas benchmark can't be run
 
 """
 
@@ -11,3 +12,6 @@ class NoContractFound(Exception):
 
 class NoVarsFound(Exception):
     """No variables were found in the contract(s)."""
+
+class BenchmarkUnavailable(Exception):
+    """The gas benchmark can't be run."""
@@ -0,0 +1,57 @@
+"""sottovuoto.Gas estimates the storage access gas of a layout
+
+The estimate only accounts for the cold slot accesses (EIP-2929):
+every slot a function touches is paid once, so the variables which
+are accessed together are cheaper when they share a slot.
+
+Typical usage example:
+    affinity = get_affinity(access_patterns, names)
+    access_gas(written, read, slot_of)
+
+"""
+
+from itertools import combinations
+
+# cold slot read (EIP-2929)
+COLD_SLOAD_GAS = 2100
+# cold slot read plus the update of a non-zero slot (EIP-2929, EIP-2200)
+COLD_SSTORE_GAS = 5000
+
+def access_gas(written, read, slot_of):
+    """Estimates the gas a function pays to access the storage.
+
+    Args:
+        written: the names of the variables written by the function
+        read: the names of the variables read by the function
+        slot_of: a dict mapping each variable name to its slot
+
+    Returns:
+        The estimated gas
+    """
+
+    written_slots = {slot_of[name] for name in written if name in slot_of}
+    read_slots = {slot_of[name] for name in read if name in slot_of}
+    return (len(written_slots) * COLD_SSTORE_GAS +
+            len(read_slots - written_slots) * COLD_SLOAD_GAS)
+
+def get_affinity(access_patterns, names):
+    """Weights how much each pair of variables gains from sharing a slot.
+
+    Args:
+        access_patterns: a list of (function, written names, read names)
+        names: the variable names, in the solver items order
+
+    Returns:
+        A dict mapping each (item, item) pair to its estimated gas gain
+    """
+
+    index_of = {name: i for i, name in enumerate(names)}
+    affinity = {}
+    for _, written, read in access_patterns:
+        accessed = sorted(index_of[name] for name in written | read
+                          if name in index_of)
+        for a, b in combinations(accessed, 2):
+            both_written = names[a] in written and names[b] in written
+            affinity[(a, b)] = affinity.get((a, b), 0) + \
+                (COLD_SSTORE_GAS if both_written else COLD_SLOAD_GAS)
+    return affinity
@@ -0,0 +1,232 @@
+"""sottovuoto.Results is a local SQLite store for the analysis results
+
+Every analysis of a file is recorded along with its options and the
+content hash of every source file it compiles with, so unchanged files
+can be skipped on the next run and the findings can be queried
+without rescanning the contracts.
+
+Typical usage example:
+    store = ResultsStore("sottovuoto.db")
+    if not store.is_unchanged(file, file_hash(file)):
+        store.record(file, file_hash(file), sottovuoto.findings)
+    store.contracts_with_spareable_slots(2)
+
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+log = logging.getLogger("sottovuoto")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    analyzed_at REAL NOT NULL,
+    duration REAL,
+    options TEXT
+);
+CREATE INDEX IF NOT EXISTS analyses_path ON analyses (path);
+CREATE INDEX IF NOT EXISTS analyses_content_hash ON analyses (content_hash);
+
+CREATE TABLE IF NOT EXISTS findings (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+    contract TEXT NOT NULL,
+    struct TEXT,
+    current_slots INTEGER NOT NULL,
+    optimal_slots INTEGER NOT NULL,
+    spareable_slots INTEGER NOT NULL,
+    suggested_order TEXT
+);
+CREATE INDEX IF NOT EXISTS findings_analysis_id ON findings (analysis_id);
+CREATE INDEX IF NOT EXISTS findings_spareable_slots ON findings (spareable_slots);
+
+CREATE TABLE IF NOT EXISTS dependencies (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_analysis_id ON dependencies (analysis_id);
+
+CREATE VIEW IF NOT EXISTS latest_analyses AS
+    SELECT * FROM analyses
+    WHERE id IN (SELECT MAX(id) FROM analyses GROUP BY path);
+"""
+
+def file_hash(path):
+    """Hashes the content of a file.
+
+    Args:
+        path: the file path
+
+    Returns:
+        The sha256 hex digest of the file content
+    """
+
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def normalize_path(path):
+    """Makes the stored paths independent from the working directory.
+
+    Args:
+        path: the file path
+
+    Returns:
+        The absolute path string
+    """
+
+    return str(Path(path).resolve())
+
+class ResultsStore():
+    """It keeps the history of the analyses in a SQLite database.
+
+    Attributes:
+        path: the database file path
+        connection: the sqlite3 connection
+    """
+
+    def __init__(self, path):
+        """Opens the database, creating the schema if necessary.
+
+        Args:
+            path: the database file path
+        """
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Closes the database connection."""
+
+        self.connection.close()
+
+    def is_unchanged(self, path, content_hash, options=None):
+        """Checks whether the last analysis of path used the same content.
+
+        The files it compiles with and the analysis options must be unchanged too.
+
+        Args:
+            path: the file path
+            content_hash: the current content hash of the file
+            options: a JSON-serializable dict of the options affecting the findings
+
+        Returns:
+            Boolean
+        """
+
+        row = self.connection.execute(
+            "SELECT id, content_hash, options FROM latest_analyses WHERE path = ?",
+            (normalize_path(path),)).fetchone()
+        if row is None or row[1] != content_hash or \
+           row[2] != json.dumps(options or {}, sort_keys=True):
+            return False
+
+        dependencies = self.connection.execute(
+            "SELECT path, content_hash FROM dependencies WHERE analysis_id = ?",
+            (row[0],)).fetchall()
+        return all(Path(dependency).is_file() and
+                   file_hash(dependency) == dependency_hash
+                   for dependency, dependency_hash in dependencies)
+
+    def record(self, path, content_hash, findings, duration=None,
+               dependencies=None, options=None):
+        """Records a new analysis of path.
+
+        Args:
+            path: the file path
+            content_hash: the content hash of the analyzed file
+            findings: the Sottovuoto.findings list
+            duration: the analysis duration, in seconds
+            dependencies: a dict mapping the files it compiles with
+                to their content hash
+            options: a JSON-serializable dict of the options affecting the findings
+        """
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO analyses (path, content_hash, analyzed_at, duration, "
+                "options) VALUES (?, ?, ?, ?, ?)",
+                (normalize_path(path), content_hash, time.time(), duration,
+                 json.dumps(options or {}, sort_keys=True)))
+            self.connection.executemany(
+                "INSERT INTO findings (analysis_id, contract, struct, "
+                "current_slots, optimal_slots, spareable_slots, suggested_order) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid,
+                  finding["contract"],
+                  finding["struct"],
+                  finding["current_slots"],
+                  finding["optimal_slots"],
+                  finding["current_slots"] - finding["optimal_slots"],
+                  json.dumps(finding["suggested_order"]))
+                 for finding in findings])
+            self.connection.executemany(
+                "INSERT INTO dependencies (analysis_id, path, content_hash) "
+                "VALUES (?, ?, ?)",
+                [(cursor.lastrowid, dependency, dependency_hash)
+                 for dependency, dependency_hash in (dependencies or {}).items()])
+        log.debug(f"{len(findings)} findings recorded for {path} in {self.path}")
+
+    def get_latest_record(self, path):
+        """Looks up the latest analysis of path.
+
+        Args:
+            path: the file path
+
+        Returns:
+            A record dict with the findings and the analysis duration,
+            see batch.analyze_file, or None if path was never analyzed
+        """
+
+        row = self.connection.execute(
+            "SELECT id, duration FROM latest_analyses WHERE path = ?",
+            (normalize_path(path),)).fetchone()
+        if row is None:
+            return None
+
+        rows = self.connection.execute(
+            "SELECT contract, struct, current_slots, optimal_slots, suggested_order "
+            "FROM findings WHERE analysis_id = ? ORDER BY rowid",
+            (row[0],)).fetchall()
+        return {"findings": [{"contract": contract,
+                              "struct": struct,
+                              "current_slots": current_slots,
+                              "optimal_slots": optimal_slots,
+                              "suggested_order": json.loads(suggested_order)}
+                             for (contract, struct, current_slots,
+                                  optimal_slots, suggested_order) in rows],
+                "duration": row[1]}
+
+    def contracts_with_spareable_slots(self, min_slots=1):
+        """Lists the latest findings which could spare at least min_slots.
+
+        Args:
+            min_slots: the minimum number of spareable slots
+
+        Returns:
+            A list of finding dicts, including their file path
+        """
+
+        rows = self.connection.execute(
+            "SELECT latest_analyses.path, findings.contract, findings.struct, "
+            "findings.current_slots, findings.optimal_slots, "
+            "findings.suggested_order "
+            "FROM findings JOIN latest_analyses "
+            "ON findings.analysis_id = latest_analyses.id "
+            "WHERE findings.spareable_slots >= ? "
+            "ORDER BY latest_analyses.path, findings.contract, findings.struct",
+            (min_slots,)).fetchall()
+        return [{"path": path,
+                 "contract": contract,
+                 "struct": struct,
+                 "current_slots": current_slots,
+                 "optimal_slots": optimal_slots,
+                 "suggested_order": json.loads(suggested_order)}
+                for (path, contract, struct, current_slots,
+                     optimal_slots, suggested_order) in rows]
@@ -0,0 +1,155 @@
+"""sottovuoto.Server keeps the analysis resident behind a Unix socket
+
+The server loads slither and the solver once, warms up the solver
+worker pool and keeps the base contracts' layouts cached, so that
+editors and pre-commit hooks only pay for the analysis itself.
+See sottovuoto.client for the protocol.
+
+Typical usage example:
+    serve("/tmp/sottovuoto.sock", {"jobs": 4, "access_aware": False,
+                                   "benchmark": False})
+
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from sottovuoto import solver
+from sottovuoto.batch import analyze_file
+
+log = logging.getLogger("sottovuoto")
+
+class AnalysisHandler(socketserver.StreamRequestHandler):
+    """It answers the requests of a client connection, one per line."""
+
+    def handle(self):
+        """Analyzes each requested file and writes back its results."""
+
+        for line in self.rfile:
+            try:
+                response = self.server.analyze(json.loads(line))
+            except Exception as exception: # pylint: disable=broad-except
+                log.exception("the request failed")
+                response = {"error": f"{type(exception).__name__}: {exception}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+class AnalysisServer(socketserver.UnixStreamServer):
+    """It serves the analysis requests, one at a time.
+
+    Attributes:
+        options: the batch.analyze_file options
+        executor: the resident pool of solver worker processes, or None
+    """
+
+    def __init__(self, socket_path, options, executor=None):
+        """Binds the server to socket_path.
+
+        Args:
+            socket_path: the Unix socket path
+            options: the batch.analyze_file options
+            executor: the resident pool of solver worker processes, or None
+        """
+
+        super().__init__(socket_path, AnalysisHandler)
+        self.options = options
+        self.executor = executor
+
+    def analyze(self, message):
+        """Analyzes the file of a request.
+
+        The "source" of a request is written to a hidden temporary
+        .sottovuoto-*.sol file in the directory of its "path" for the
+        duration of the analysis, so file watchers may notice it.
+
+        Args:
+            message: the request dict, see sottovuoto.client
+
+        Returns:
+            The response dict
+        """
+
+        path = message.get("path")
+        options = dict(self.options,
+                       access_aware=message.get("access_aware",
+                                                self.options["access_aware"]),
+                       benchmark=False)
+
+        if "source" not in message:
+            record = analyze_file(path, options, self.executor)
+            return dict(record, path=path)
+
+        # write the source next to its file, so its relative imports still
+        # resolve, or in the temporary directory if that one is read-only
+        directory = Path(path).parent if path else None
+        try:
+            file_descriptor, source_file = tempfile.mkstemp(
+                prefix=".sottovuoto-", suffix=".sol", dir=directory)
+        except OSError as exception:
+            log.warning(f"can't write the source next to {path} ({exception}): "
+                        "its relative imports won't resolve")
+            file_descriptor, source_file = tempfile.mkstemp(
+                prefix=".sottovuoto-", suffix=".sol")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as source:
+                source.write(message["source"])
+            record = analyze_file(source_file, options, self.executor, path)
+        finally:
+            os.remove(source_file)
+        return dict(record, path=path)
+
+def is_serving(socket_path):
+    """Checks whether a server already listens on socket_path.
+
+    Args:
+        socket_path: the Unix socket path
+
+    Returns:
+        Boolean
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+def serve(socket_path, options):
+    """Serves the analysis requests until interrupted.
+
+    Args:
+        socket_path: the Unix socket path
+        options: the batch.analyze_file options
+    """
+
+    if Path(socket_path).exists():
+        if is_serving(socket_path):
+            log.error(f"a server is already listening on {socket_path}.")
+            return
+        # left behind by a server which didn't shut down cleanly
+        os.remove(socket_path)
+
+    executor = None
+    if options["jobs"] > 1:
+        executor = ProcessPoolExecutor(max_workers=options["jobs"])
+    # warm up the solver, and the worker processes
+    solver.solve_many([{"weights": [1]}] * max(options["jobs"], 2),
+                      options["jobs"], executor)
+
+    try:
+        with AnalysisServer(socket_path, options, executor) as server:
+            log.info(f"sottovuoto is listening on {socket_path}")
+            server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("sottovuoto server stopped.")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if Path(socket_path).exists():
+            os.remove(socket_path)
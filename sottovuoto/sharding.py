@@ -0,0 +1,224 @@
+"""sottovuoto.Sharding splits a scan across CI nodes and merges it back
+
+The files are partitioned by their expected analysis cost: the
+durations of a previous merged report or, for the files which
+are not in it, their size. Every node reads the same report, so
+it computes the same partition and analyzes its own shard, then
+the shard reports are merged into a single one.
+
+Typical usage example:
+    durations = read_durations("previous-report.json")
+    shards = partition(files, get_costs(files, durations), 4)
+    write_report("shard-1.json", make_report(records, "1/4"))
+    merged = merge_reports(["shard-1.json", "shard-2.json"])
+
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+log = logging.getLogger("sottovuoto")
+
+def parse_shard(shard):
+    """Parses the --shard argument.
+
+    Args:
+        shard: a "i/N" string, with 1 <= i <= N
+
+    Returns:
+        A tuple with the shard index and the number of shards
+
+    Raises:
+        argparse.ArgumentTypeError: the shard is malformed
+    """
+
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError as exception:
+        raise argparse.ArgumentTypeError(
+            f"{shard} is not a valid shard, expected i/N") from exception
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"{shard} is not a valid shard, expected 1 <= i <= N")
+    return index, count
+
+def get_costs(files, durations):
+    """Estimates the analysis cost of each file.
+
+    The files without a recorded duration are estimated from their
+    size, scaled by the average duration per byte of the other files.
+
+    Args:
+        files: the file paths
+        durations: a dict mapping the files to their recorded duration
+
+    Returns:
+        A dict mapping each file to its estimated cost
+    """
+
+    sizes = {file: Path(file).stat().st_size for file in files}
+
+    timed_files = [file for file in files if file in durations]
+    timed_bytes = sum(sizes[file] for file in timed_files)
+    seconds_per_byte = 1
+    if timed_bytes:
+        seconds_per_byte = sum(durations[file] for file in timed_files) / timed_bytes
+
+    return {file: durations[file] if file in durations
+            else sizes[file] * seconds_per_byte
+            for file in files}
+
+def partition(files, costs, count):
+    """Splits the files in count shards of about the same cost.
+
+    The most expensive files are assigned first, each one to the
+    cheapest shard so far (longest processing time first). Ties are
+    broken by path and shard index, so the partition is deterministic.
+
+    Args:
+        files: the file paths
+        costs: a dict mapping each file to its cost
+        count: the number of shards
+
+    Returns:
+        A list of count lists of files, each one sorted by path
+    """
+
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for file in sorted(files, key=lambda file: (-costs[file], file)):
+        cheapest = min(range(count), key=lambda shard: (loads[shard], shard))
+        shards[cheapest].append(file)
+        loads[cheapest] += costs[file]
+
+    log.debug(f"estimated shard costs: {loads}")
+    return [sorted(shard) for shard in shards]
+
+def make_report(records, shard=None, scan_paths=None):
+    """Builds a JSON-serializable report of the analyzed files.
+
+    Args:
+        records: a list of (file, record) tuples, see batch.analyze_file
+        shard: the "i/N" shard the records belong to, or None
+        scan_paths: a dict mapping the files to their path relative
+            to the scanned folder, or None to use the file paths
+
+    Returns:
+        The report dict
+    """
+
+    scan_paths = scan_paths or {}
+    return {"shards": [shard] if shard else [],
+            "files": [{"path": file,
+                       "scan_path": scan_paths.get(file, file),
+                       "duration": record["duration"],
+                       "findings": record["findings"]}
+                      for file, record in records]}
+
+def read_durations(path):
+    """Reads the analysis durations of a previous report.
+
+    Args:
+        path: the report file path
+
+    Returns:
+        A dict mapping the files path relative to the scanned folder
+        to their duration, in seconds
+    """
+
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {file.get("scan_path", file["path"]): file["duration"]
+            for file in report["files"]
+            if file["duration"] is not None}
+
+def write_report(path, report):
+    """Writes a report to a JSON file.
+
+    Args:
+        path: the report file path
+        report: the report dict
+    """
+
+    Path(path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+def merge_reports(paths):
+    """Merges the shard reports into a single report.
+
+    Args:
+        paths: the shard report file paths
+
+    Returns:
+        The merged report dict, with the files sorted by path
+
+    Raises:
+        ValueError: the shards are incomplete, duplicated or of different counts
+    """
+
+    shards = []
+    files = {}
+    for path in paths:
+        report = json.loads(Path(path).read_text(encoding="utf-8"))
+        shards += report["shards"]
+        for file in report["files"]:
+            if file["path"] in files:
+                log.warning(f"{file['path']} is in more than one report: "
+                            f"keeping the one from {path}")
+            files[file["path"]] = file
+
+    check_shards(shards)
+    return {"shards": sorted(shards),
+            "files": [files[path] for path in sorted(files)]}
+
+def check_shards(shards):
+    """Checks that the merged shards are exactly 1/N to N/N.
+
+    Args:
+        shards: the "i/N" shards of the merged reports
+
+    Raises:
+        ValueError: the shards are incomplete, duplicated or of different counts
+    """
+
+    if not shards:
+        return
+    try:
+        parsed = [parse_shard(shard) for shard in shards]
+    except argparse.ArgumentTypeError as exception:
+        raise ValueError(str(exception)) from exception
+    counts = {count for _, count in parsed}
+    if len(counts) > 1:
+        raise ValueError(f"the reports belong to different shard counts: {sorted(shards)}")
+    count = counts.pop()
+    indexes = sorted(index for index, _ in parsed)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"expected the shards 1/{count} to {count}/{count}, "
+                         f"got: {sorted(shards)}")
+
+def output_report(report):
+    """Outputs the findings of a report which could spare slots.
+
+    Args:
+        report: the report dict
+    """
+
+    spareable_slots = 0
+    for file in report["files"]:
+        for finding in file["findings"]:
+            spared = finding["current_slots"] - finding["optimal_slots"]
+            if spared <= 0:
+                continue
+            spareable_slots += spared
+            name = finding["contract"]
+            if finding["struct"]:
+                name += f" -> {finding['struct']}"
+            # only the nested structs may be improved
+            suggestion = "reordering the nested structs"
+            if finding["suggested_order"]:
+                suggestion = f"declaring: {', '.join(finding['suggested_order'])}"
+            log.info(f"{file['path']} -> {name}: {spared} slot(s) could be spared "
+                     f"by {suggestion}")
+
+    log.info(f"{len(report['files'])} file(s) analyzed, "
+             f"{spareable_slots} slot(s) could be spared in total.")
@@ -0,0 +1,168 @@
+"""sottovuoto.Solver wraps the bin packing solver
+
+The solver only deals with plain item weights, so independent
+packing problems (every struct and the contract storage) can be
+shipped to a pool of worker processes and solved concurrently.
+
+Typical usage example:
+    bins = solve_bin_packing([16, 32, 16])
+    all_bins = solve_many([{"weights": [16, 32, 16]},
+                           {"weights": [8, 32, 8]}], jobs=2)
+
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from ortools.linear_solver import pywraplp
+from sottovuoto.storage import SLOT_SPACE_IN_BYTES
+
+log = logging.getLogger("sottovuoto")
+
+# the affinity pass grows as items^3: past this time limit the
+# first pass solution, which is already optimal in bins, is kept
+AFFINITY_TIME_LIMIT_MS = 5000
+
+def solve_bin_packing(weights, bin_capacity=SLOT_SPACE_IN_BYTES, affinity=None,
+                      first_bin_capacity=None):
+    """Packs the weights in the minimum number of bins.
+
+    When an affinity is provided, a second pass keeps the minimum
+    number of bins and maximizes the affinity of the items sharing a bin.
+
+    Args:
+        weights: the list of item sizes, in bytes
+        bin_capacity: the size of each bin, in bytes
+        affinity: a dict mapping (item, item) pairs to their gain
+            when they are packed in the same bin
+        first_bin_capacity: the capacity of an already used bin 0, which
+            doesn't count as a new bin (e.g. a slot shared with the base contracts)
+
+    Returns:
+        A dict mapping each used bin to the list of its item indexes,
+        or None if the solver couldn't find an optimal solution
+
+    References:
+        https://en.wikipedia.org/wiki/Bin_packing_problem
+        https://developers.google.com/optimization/pack/bin_packing
+    """
+
+    items = list(range(len(weights)))
+    bins = items
+    capacities = {j: bin_capacity for j in bins}
+    counted_bins = bins
+    if first_bin_capacity is not None and items:
+        # bin 0 is the small shared one: every item may still
+        # need a full bin of its own
+        bins = list(range(len(items) + 1))
+        capacities = {j: bin_capacity for j in bins}
+        capacities[0] = first_bin_capacity
+        counted_bins = bins[1:]
+
+    # create the mip solver with the SCIP backend
+    solver = pywraplp.Solver.CreateSolver('SCIP')
+    assert solver
+
+    # variables, needed for the constraints later
+    # x[i, j] = 1 if item i is packed in bin j
+    x = {}
+    for i in items:
+        for j in bins:
+            x[(i, j)] = solver.IntVar(0, 1, 'x_%i_%i' % (i, j))
+
+    # y[j] = 1 if bin j is used
+    y = {}
+    for j in bins:
+        y[j] = solver.IntVar(0, 1, 'y[%i]' % j)
+
+    # constraints
+    # each item must be in exactly one bin
+    for i in items:
+        solver.Add(sum(x[i, j] for j in bins) == 1)
+
+    # the amount packed in each bin cannot exceed its capacity
+    for j in bins:
+        solver.Add(
+            sum(x[(i, j)] * weights[i] for i in items) <= y[j] * capacities[j])
+
+    # minimize the number of bins used
+    solver.Minimize(solver.Sum([y[j] for j in counted_bins]))
+
+    def get_packed_bins():
+        packed_bins = {}
+        for j in bins:
+            if y[j].solution_value() == 1:
+                bin_items = [i for i in items if x[i, j].solution_value() > 0]
+                if bin_items:
+                    packed_bins[j] = bin_items
+        return packed_bins
+
+    status = solver.Solve()
+    if status != pywraplp.Solver.OPTIMAL:
+        return None
+
+    packed_bins = get_packed_bins()
+    log.debug(f"Number of bins used: {len(packed_bins)}")
+
+    if affinity:
+        # keep the number of bins optimal...
+        solver.Add(solver.Sum([y[j] for j in counted_bins]) <=
+                   len([j for j in packed_bins if j in counted_bins]))
+
+        # z[a, b, j] = 1 only if both items a and b are packed in bin j
+        z = {}
+        for (a, b) in affinity:
+            for j in bins:
+                z[(a, b, j)] = solver.IntVar(0, 1, 'z_%i_%i_%i' % (a, b, j))
+                solver.Add(z[(a, b, j)] <= x[(a, j)])
+                solver.Add(z[(a, b, j)] <= x[(b, j)])
+
+        # ...and maximize the affinity of the items sharing a bin
+        solver.Maximize(solver.Sum(
+            [affinity[(a, b)] * z[(a, b, j)] for (a, b, j) in z]))
+
+        solver.SetTimeLimit(AFFINITY_TIME_LIMIT_MS)
+        if solver.Solve() == pywraplp.Solver.OPTIMAL:
+            packed_bins = get_packed_bins()
+            log.debug(f"Affinity packed: {solver.Objective().Value()}")
+        else:
+            log.debug("no optimal affinity packing within "
+                      f"{AFFINITY_TIME_LIMIT_MS} ms, keeping the first solution")
+
+    log.debug(f"Time = {solver.WallTime()} milliseconds")
+    return packed_bins
+
+def _solve_problem(problem):
+    """Unpacks a problem dict into solve_bin_packing's arguments.
+
+    Args:
+        problem: a dict of solve_bin_packing keyword arguments
+
+    Returns:
+        The return value of solve_bin_packing
+    """
+
+    return solve_bin_packing(**problem)
+
+def solve_many(problems, jobs=1, executor=None):
+    """Solves a list of independent bin packing problems.
+
+    Args:
+        problems: a list of dicts of solve_bin_packing keyword arguments
+        jobs: the number of worker processes to use
+        executor: a resident pool of worker processes to use, or None
+            to start a new one
+
+    Returns:
+        The list of solutions, in the same order as problems
+    """
+
+    if jobs <= 1 or len(problems) < 2:
+        return [_solve_problem(problem) for problem in problems]
+
+    log.debug(f"solving {len(problems)} problems with {jobs} workers")
+    if executor is not None:
+        return list(executor.map(_solve_problem, problems))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(problems))) as pool:
+        # map() yields the results in submission order,
+        # so the merge is deterministic
+        return list(pool.map(_solve_problem, problems))
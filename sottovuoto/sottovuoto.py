@@ -11,23 +11,25 @@ Typical usage example:
 """
 
 import logging
+from pathlib import Path
 from slither.slither import Slither
 from slither.core.declarations import (
-    StructureContract
+    Structure
 )
 from slither.core.variables.state_variable import (
     StateVariable
 )
-from ortools.linear_solver import pywraplp
 from sottovuoto.storage import (
     Storage,
-    SLOT_SPACE_IN_BYTES
+    SLOT_SPACE_IN_BYTES,
+    get_inherited_bytes
 )
 from sottovuoto.exceptions import (
     NoContractFound,
     NoVarsFound
 )
-from sottovuoto import utils
+from sottovuoto import gas, solver, utils
+from sottovuoto.results import file_hash
 
 log = logging.getLogger("sottovuoto")
 
@@ -39,19 +41,56 @@ class Sottovuoto():
         contract: a slither.core.Contract instance
         storage: a sottovuoto.Storage instance
         variables: the full list of state variables in the contract
+        jobs: the number of worker processes used to solve the packing problems
+        findings: the slot counts and suggested order of every analyzed
+            struct and contract, as plain data
+        access_aware: whether the contract packing prefers co-locating
+            the variables accessed by the same functions
+        gas_savings: the estimated gas saved by each function with the
+            optimized contract layout (access-aware mode only)
+        struct_layouts: the memoized analysis of each struct type
+        struct_solutions: the precomputed solver solutions of the structs
+        optimal_slots_count: the slots the optimized layout of the last
+            self.are_tight_packed call takes up, nested structs included
+        layout_cache: the memoized end state (slot id and bytes left) of
+            each base contracts linearization, it can be shared between instances
+        base_layout: the end state of the analyzed contract's base contracts
+        executor: a resident pool of worker processes for the solver, or None
+        file_hashes: the content hash of each source file of the compilation
+        path_alias: the path file stands for, when it is a temporary copy
     """
 
-    def __init__(self, file):
+    def __init__(self, file, jobs=1, access_aware=False, layout_cache=None,
+                 executor=None, path_alias=None):
         """Initialize the instance based on file.
 
         Args:
             file: a file path string
+            jobs: the number of worker processes used by the solver
+            access_aware: enable the access-pattern-aware contract packing
+            layout_cache: a dict shared with other instances, to reuse the
+                layouts of their base contracts
+            executor: a resident concurrent.futures pool used by the solver
+            path_alias: the path file stands for, used in place of it to key
+                the layouts of its contracts (e.g. file is a temporary copy)
         """
 
         self.file = file
+        self.jobs = jobs
+        self.access_aware = access_aware
+        self.gas_savings = {}
         self.contract = {}
         self.storage = Storage()
         self.variables = []
+        self.findings = []
+        self.struct_layouts = {}
+        self.struct_solutions = {}
+        self.optimal_slots_count = 0
+        self.layout_cache = {} if layout_cache is None else layout_cache
+        self.base_layout = (0, SLOT_SPACE_IN_BYTES)
+        self.file_hashes = {}
+        self.executor = executor
+        self.path_alias = path_alias
 
     def get_state_variables(self):
         """Collects all the state variables from self.file.
@@ -70,8 +109,13 @@ class Sottovuoto():
         if len(slither.contracts) < 1:
             raise NoContractFound(f"{self.file} does not contain any contract.")
 
+        # the imported files may change the storage sizes too (e.g. structs, constants)
+        for filename in slither.source_code:
+            self.get_file_hash(filename)
+
         # @todo support more than 1 contract per file
-        self.contract = slither.contracts[0]
+        # the most derived contract includes its bases' storage
+        self.contract = (slither.contracts_derived or slither.contracts)[0]
 
         # Contract object:
         # https://github.com/crytic/slither/blob/0ec487460690482c72cacdea6705e2c51bb3981e/slither/core/declarations/contract.py
@@ -92,11 +136,15 @@ class Sottovuoto():
                         f"dynamic? {state_variable.type.is_dynamic}, "
                         f"inherited? {state_variable.is_inherited})")
 
-            # skip it if it's inherited
-            # @todo support inherited vars
+            # skip it if it's inherited: it can't be moved from here,
+            # self.get_base_layout accounts for the slots it takes up
             if state_variable.is_inherited:
                 continue
 
+            # skip it if it doesn't take up storage
+            if utils.is_constant(state_variable):
+                continue
+
             # skip it if it's a dynamic type (dynamic array and mappings)
             # as they don't fill the slots sequentially
             if state_variable.type.is_dynamic:
@@ -109,23 +157,121 @@ class Sottovuoto():
 
         return vars_in_contract, structs_count
 
-    def get_opt_slots_map(self, vars):
-        """Tries to optimize the vars order to use less slots.
+    def get_own_variables(self, contract):
+        """Collects the state variables a contract lays out in the storage.
 
         Args:
-            vars: the full list of vars to pack
+            contract: a slither.core.Contract instance
 
         Returns:
-            A tuple with the success flag and the optimized slots map, or None
+            The ordered list of the variables declared by contract,
+            the dynamic ones included as they still take up a slot
+        """
+
+        return [var for var in contract.state_variables_ordered
+                if var.contract == contract and
+                not utils.is_constant(var)]
+
+    def get_file_hash(self, filename):
+        """Hashes a source file once per analysis.
+
+        Args:
+            filename: the absolute file path
+
+        Returns:
+            The content hash of the file, or None if it isn't on the filesystem
+        """
+
+        if filename not in self.file_hashes:
+            self.file_hashes[filename] = file_hash(filename) \
+                if Path(filename).is_file() else None
+        return self.file_hashes[filename]
+
+    def get_imported_files(self, contract):
+        """Collects the files the source unit of a contract imports.
 
-        References:
-            https://en.wikipedia.org/wiki/Bin_packing_problem
-            https://developers.google.com/optimization/pack/bin_packing
-            https://pypi.org/project/binpacking/
+        Args:
+            contract: a slither.core.Contract instance
+
+        Returns:
+            The sorted list of the absolute paths it imports, directly or not
+        """
+
+        own_file = contract.file_scope.filename.absolute
+        imported_files = set()
+        scopes = list(contract.file_scope.accessible_scopes)
+        while scopes:
+            scope = scopes.pop()
+            filename = scope.filename.absolute
+            if filename == own_file or filename in imported_files:
+                continue
+            imported_files.add(filename)
+            scopes += scope.accessible_scopes
+        return sorted(imported_files)
+
+    def get_contract_key(self, contract):
+        """Identifies a contract declaration across analyses.
+
+        The files its source unit imports are part of the key, as their
+        structs and constants may change the size of its variables.
+
+        Args:
+            contract: a slither.core.Contract instance
+
+        Returns:
+            A tuple with the contract file, its content hash, the contract
+            name and the content hash of each file it imports
         """
 
-        data = {}
-        data['weights'] = []
+        filename = contract.source_mapping.filename.absolute
+        content_hash = self.get_file_hash(filename)
+        if self.path_alias and filename == str(Path(self.file).resolve()):
+            filename = str(Path(self.path_alias).resolve())
+        imports = tuple((imported_file, self.get_file_hash(imported_file))
+                        for imported_file in self.get_imported_files(contract))
+        return (filename, content_hash, contract.name, imports)
+
+    def get_base_layout(self):
+        """Computes where the base contracts' storage ends.
+
+        The state after each prefix of the inheritance linearization
+        is memoized in self.layout_cache, so every base contract is
+        laid out once, whatever the number of contracts deriving from it.
+
+        Returns:
+            A tuple with the last slot id used and the bytes left in it
+        """
+
+        layout = (0, SLOT_SPACE_IN_BYTES)
+        key = ()
+        # the storage follows the linearization, from the most base contract
+        for base in reversed(self.contract.inheritance):
+            key += (self.get_contract_key(base),)
+            if key not in self.layout_cache:
+                storage = Storage(self.get_declared_footprint, *layout)
+                storage.get_slots_map(self.get_own_variables(base))
+                self.layout_cache[key] = (storage.current_slot_id,
+                                          storage.bytes_left_in_slot)
+                log.debug(f"{base.name}'s storage ends at slot "
+                          f"#{storage.current_slot_id} "
+                          f"({storage.bytes_left_in_slot} bytes left)")
+            layout = self.layout_cache[key]
+        return layout
+
+    def get_packing_problem(self, vars, first_bin_capacity=None):
+        """Splits the vars into the bin packing items and the tail vars.
+
+        Args:
+            vars: the full list of vars to pack
+            first_bin_capacity: the bytes left in the slot shared with the
+                base contracts, or None
+
+        Returns:
+            A tuple with the solver problem, the rich vars matching its
+            items and the structs and arrays to add at the end
+        """
+
+        weights = []
         index_to_rich_var = []
         # set structs and arrays aside, we'll add them at the end
         tail_vars = []
@@ -133,112 +279,301 @@ class Sottovuoto():
             if utils.is_struct(var) or utils.is_array(var):
                 tail_vars.append(var)
                 continue
-            data['weights'].append(var.type.storage_size[0])
+            weights.append(var.type.storage_size[0])
             index_to_rich_var.append(var)
 
-        data['items'] = list(range(len(data['weights'])))
-        data['bins'] = data['items']
-        data['bin_capacity'] = SLOT_SPACE_IN_BYTES
+        problem = {"weights": weights}
+        if first_bin_capacity is not None:
+            problem["first_bin_capacity"] = first_bin_capacity
+        return problem, index_to_rich_var, tail_vars
 
-        # create the mip solver with the SCIP backend
-        solver = pywraplp.Solver.CreateSolver('SCIP')
-        assert solver
+    def get_opt_slots_map(self, vars, bins=None):
+        """Tries to optimize the vars order to use less slots.
 
-        # variables, needed for the constraints later
-        # x[i, j] = 1 if item i is packed in bin j
-        x = {}
-        for i in data['items']:
-            for j in data['bins']:
-                x[(i, j)] = solver.IntVar(0, 1, 'x_%i_%i' % (i, j))
+        The slot 0 of the map is the one shared with the base contracts,
+        if the storage of the last self.are_tight_packed call shares one.
 
-        # y[j] = 1 if bin j is used
-        y = {}
-        for j in data['bins']:
-            y[j] = solver.IntVar(0, 1, 'y[%i]' % j)
+        Args:
+            vars: the full list of vars to pack
+            bins: the solver solution for vars, if it was already computed
 
-        # constraints
-        # each item must be in exactly one bin
-        for i in data['items']:
-            solver.Add(sum(x[i, j] for j in data['bins']) == 1)
+        Returns:
+            A tuple with the success flag and the optimized slots map, or None
+        """
 
-        # the amount packed in each bin cannot exceed its capacity
-        for j in data['bins']:
-            solver.Add(
-                sum(x[(i, j)] * data['weights'][i] for i in data['items']) <= y[j] *
-                data['bin_capacity'])
+        problem, index_to_rich_var, tail_vars = self.get_packing_problem(
+            vars, self.storage.inherited_bytes)
+        if bins is None:
+            bins = solver.solve_bin_packing(**problem)
+        if bins is None:
+            return False, None
 
-        # minimize the number of bins used
-        solver.Minimize(solver.Sum([y[j] for j in data['bins']]))
+        opt_slots_map = {}
+        for j in bins:
+            # append the vars' rich objects
+            bin_items = [index_to_rich_var[i] for i in bins[j]]
+            log.debug(f"Slot #{j}")
+            log.debug(f"  Items packed: {[str(var) for var in bin_items]}")
+            log.debug(f"  Total weight: {sum(problem['weights'][i] for i in bins[j])}")
+            opt_slots_map[j] = bin_items
+
+        # add the structs and arrays at the end,
+        # never in the slot shared with the base contracts
+        shares_first_slot = self.storage.inherited_bytes is not None
+        current_slot = max(opt_slots_map, default=0 if shares_first_slot else -1)
+        for struct_or_array in tail_vars:
+            current_slot += 1
+            opt_slots_map[current_slot] = [struct_or_array]
+
+        return True, opt_slots_map
+
+    def solve_packing_problems(self, vars_in_contract):
+        """Solves the structs and the contract packing problems together.
+
+        The problems are independent, so they are solved concurrently
+        when more than one job is allowed.
 
-        status = solver.Solve()
+        Args:
+            vars_in_contract: the contract's vars to pack, or None to skip it
 
-        opt_slots_map = {}
-        if status == pywraplp.Solver.OPTIMAL:
-            num_bins = 0
-            for j in data['bins']:
-                if y[j].solution_value() == 1:
-                    bin_items = []
-                    bin_weight = 0
-                    for i in data['items']:
-                        if x[i, j].solution_value() > 0:
-                            # append the var's rich object
-                            bin_items.append(index_to_rich_var[i])
-                            bin_weight += data['weights'][i]
-                    if bin_items:
-                        num_bins += 1
-                        log.debug(f"Slot #{j}")
-                        log.debug(f"  Items packed: {[str(var) for var in bin_items]}")
-                        log.debug(f"  Total weight: {bin_weight}")
-                        opt_slots_map[j] = bin_items
-
-            # add the structs and arrays at the end
-            current_slot = len(opt_slots_map)
-            for struct_or_array in tail_vars:
-                current_slot += 1
-                opt_slots_map[current_slot] = [struct_or_array]
-
-            log.debug(f"Number of slots used: {num_bins}")
-            log.debug(f"Time = {solver.WallTime()} milliseconds")
-            return True, opt_slots_map
-
-        return False, None
-
-    def are_tight_packed(self, vars):
+        Returns:
+            A tuple with the list of solutions for the declared structs
+            and the solution for the contract (or None)
+        """
+
+        problems = []
+        for struct in self.contract.structures_declared:
+            problem, _, _ = self.get_packing_problem(self.break_down_struct(struct))
+            problems.append(problem)
+        if vars_in_contract is not None:
+            problem, index_to_rich_var, _ = self.get_packing_problem(
+                vars_in_contract, get_inherited_bytes(self.base_layout[1]))
+            if self.access_aware:
+                problem["affinity"] = gas.get_affinity(
+                    self.get_access_patterns(),
+                    [str(var) for var in index_to_rich_var])
+            problems.append(problem)
+
+        solutions = solver.solve_many(problems, self.jobs, self.executor)
+        if vars_in_contract is not None:
+            return solutions[:-1], solutions[-1]
+        return solutions, None
+
+    def are_tight_packed(self, vars, bins=None, base_layout=None):
         """Verifies whether the vars are tightly packed.
 
         Args:
             vars: the full list of vars to pack
+            bins: the solver solution for vars, if it was already computed
+            base_layout: the end state of the base contracts' storage, or None
 
         Returns:
             A tuple with number of slots spared and the optimized slots map
         """
 
-        self.storage = Storage()
-        # get the current slot space occupied
+        # size the nested structs and arrays first, as sizing a struct
+        # analyzes it and that replaces self.storage
+        for var in vars:
+            if utils.is_struct(var) or utils.is_array(var):
+                self.get_footprint(var.type)
+
+        # the storage as it is declared, nested structs included
+        self.storage = Storage(self.get_declared_footprint, *(base_layout or ()))
         current_slots_map = self.storage.get_slots_map(vars)
-        log.debug(f"currently they use {len(current_slots_map)} slots:")
+        log.debug(f"currently they use {self.storage.count_slots()} slots:")
         log.debug(f"{current_slots_map}")
 
-        # @todo we could add here a check if len(current_slots_map) = min_slots_possible
+        # the nested structs report their own spared slots, so only
+        # the order of vars is compared, with the nested structs optimized
+        own_storage = Storage(self.get_footprint, *(base_layout or ()))
+        own_storage.get_slots_map(vars)
+        current_slots_count = own_storage.count_slots()
+
+        # @todo we could add here a check if current_slots_count = min_slots_possible
 
         # get the optimized slots map
-        solved, opt_slots_map = self.get_opt_slots_map(vars)
+        solved, opt_slots_map = self.get_opt_slots_map(vars, bins)
         if not solved:
+            self.optimal_slots_count = self.storage.count_slots()
             log.error("the solver couldn't find an optimal solution :(")
             return True, {}
 
-        log.debug(f"the optimized slots map uses {len(opt_slots_map)} slots:")
+        opt_slots_count = self.count_slots(opt_slots_map)
+        log.debug(f"the optimized slots map uses {opt_slots_count} slots:")
         log.debug(f"{opt_slots_map}")
 
+        self.optimal_slots_count = min(opt_slots_count, current_slots_count)
+
         # return it, if it occupies less slots
-        if len(opt_slots_map) < len(current_slots_map):
-            log.debug(f"{len(current_slots_map) - len(opt_slots_map)}"
+        if opt_slots_count < current_slots_count:
+            log.debug(f"{current_slots_count - opt_slots_count}"
                       " slots can be spared")
-            return len(current_slots_map) - len(opt_slots_map), opt_slots_map
+            return current_slots_count - opt_slots_count, opt_slots_map
 
         # they occupy the same amount of slots
         return 0, None
 
+    def count_slots(self, opt_slots_map):
+        """Counts the slots an optimized slots map takes up.
+
+        The slot shared with the base contracts, if the storage of
+        the last self.are_tight_packed call shares one, is not counted.
+
+        Args:
+            opt_slots_map: the optimized slots map
+
+        Returns:
+            The number of slots, including the ones of the structs and arrays
+        """
+
+        slots_count = 0
+        for slot in opt_slots_map:
+            if slot == 0 and self.storage.inherited_bytes is not None:
+                continue
+            first_var = opt_slots_map[slot][0]
+            if utils.is_struct(first_var) or utils.is_array(first_var):
+                slots_count += self.get_footprint(first_var.type)
+            else:
+                slots_count += 1
+        return slots_count
+
+    def get_footprint(self, var_type, declared=False):
+        """Computes the exact number of slots a struct or an array takes up.
+
+        Structs are sized by their optimized layout, so the inner
+        structs are always optimized before the outer ones.
+
+        Args:
+            var_type: the struct or array type
+            declared: size the structs by their declared layout instead
+
+        Returns:
+            The number of slots
+        """
+
+        if utils.is_struct_type(var_type):
+            struct_layout = self.analyze_struct(var_type.type)
+            return struct_layout["declared_slots" if declared else "slots"]
+
+        # dynamic arrays only store their length in place
+        if not utils.is_array_type(var_type) or var_type.is_dynamic:
+            return 1
+
+        length = int(str(var_type.length_value))
+        element = var_type.type
+        if utils.is_struct_type(element) or utils.is_array_type(element):
+            return length * self.get_footprint(element, declared)
+
+        # elementary types are packed in each slot
+        elements_per_slot = SLOT_SPACE_IN_BYTES // element.storage_size[0]
+        return -(-length // elements_per_slot)
+
+    def get_declared_footprint(self, var_type):
+        """Computes the number of slots a struct or an array takes up as declared.
+
+        Args:
+            var_type: the struct or array type
+
+        Returns:
+            The number of slots
+        """
+
+        return self.get_footprint(var_type, declared=True)
+
+    def analyze_struct(self, struct):
+        """Optimizes a struct type once and memoizes its layout.
+
+        Args:
+            struct: the slither Structure
+
+        Returns:
+            A dict with the slots spared, the optimized slots map (or None)
+            and the number of slots the struct takes up, optimized and as declared
+        """
+
+        name = struct.canonical_name
+        if name not in self.struct_layouts:
+            vars_in_struct = self.break_down_struct(struct)
+            (spared_slots, opt_slots_map) = self.are_tight_packed(
+                vars_in_struct, self.struct_solutions.get(name))
+            self.add_finding(str(struct), opt_slots_map,
+                             getattr(struct, "contract", None))
+            self.struct_layouts[name] = {
+                "spared_slots": spared_slots,
+                "opt_slots_map": opt_slots_map,
+                "slots": self.findings[-1]["optimal_slots"],
+                "declared_slots": self.findings[-1]["current_slots"]}
+        return self.struct_layouts[name]
+
+    def get_access_patterns(self):
+        """Collects which state variables each entry point accesses.
+
+        Returns:
+            A list of tuples with the function name and the sets of
+            the names of the state variables it writes and reads
+        """
+
+        access_patterns = []
+        for function in self.contract.functions_entry_points:
+            written = {str(var) for var in function.all_state_variables_written()}
+            read = {str(var) for var in function.all_state_variables_read()}
+            access_patterns.append((function.full_name, written, read))
+        return access_patterns
+
+    def estimate_gas_savings(self, opt_slots_map):
+        """Estimates the gas each function saves with the optimized layout.
+
+        It compares opt_slots_map against the current layout of the
+        last self.are_tight_packed call.
+
+        Args:
+            opt_slots_map: the optimized slots map
+
+        Returns:
+            A dict mapping each entry point to its estimated gas saved per call
+        """
+
+        current_slot_of = {entry["name"]: slot
+                           for slot in self.storage.slots
+                           for entry in self.storage.slots[slot]}
+        opt_slot_of = {str(var): slot
+                       for slot in opt_slots_map
+                       for var in opt_slots_map[slot]}
+
+        gas_savings = {}
+        for function, written, read in self.get_access_patterns():
+            gas_savings[function] = \
+                gas.access_gas(written, read, current_slot_of) - \
+                gas.access_gas(written, read, opt_slot_of)
+        return gas_savings
+
+    def add_finding(self, struct, opt_slots_map, contract=None):
+        """Records the outcome of the last self.are_tight_packed call.
+
+        Unlike the spared slots returned by self.are_tight_packed, the
+        slot counts include the gains of reordering the nested structs.
+
+        Args:
+            struct: the analyzed struct name, or None for the contract storage
+            opt_slots_map: the optimized slots map, or None if it can't be improved
+            contract: the contract declaring struct, if it isn't self.contract
+        """
+
+        current_slots = self.storage.count_slots()
+        optimal_slots = self.optimal_slots_count
+        suggested_order = None
+        if opt_slots_map:
+            suggested_order = [f"{var.type} {var}"
+                               for slot in opt_slots_map
+                               for var in opt_slots_map[slot]]
+
+        self.findings.append({
+            "contract": (contract or self.contract).name,
+            "struct": struct,
+            "current_slots": current_slots,
+            "optimal_slots": optimal_slots,
+            "suggested_order": suggested_order})
+
     def break_down_struct(self, struct):
         """Breaks down a struct into its members.
 
@@ -255,14 +590,18 @@ class Sottovuoto():
             # so we need to go up two types
             for var in struct.type.type.elems_ordered:
                 vars.append(var)
-        if isinstance(struct, StructureContract):
+        if isinstance(struct, Structure):
             for var in struct.elems_ordered:
                 vars.append(var)
         return vars
 
-    def are_structs_packed(self):
+    def are_structs_packed(self, solutions=None):
         """A wrapper around self.are_tight_packed for structs.
 
+        Args:
+            solutions: the solver solutions for the declared structs, if
+                they were already computed
+
         Returns:
             A tuple with number of slots spared and the optimized variables
         """
@@ -270,9 +609,15 @@ class Sottovuoto():
         spared_slots = 0
         # we are only interested in structs
         opt_structs = []
-        for var in [var for var in self.contract.structures_declared]:
-            vars_in_struct = self.break_down_struct(var)
-            (struct_is_tight_packed, new_members_order) = self.are_tight_packed(vars_in_struct)
+        structs = self.contract.structures_declared
+        if solutions is not None:
+            self.struct_solutions.update(
+                zip([struct.canonical_name for struct in structs], solutions))
+        for var in structs:
+            # the nested structs may have been analyzed already
+            struct_layout = self.analyze_struct(var)
+            struct_is_tight_packed = struct_layout["spared_slots"]
+            new_members_order = struct_layout["opt_slots_map"]
             if struct_is_tight_packed != 0:
                 log.debug(f"{str(var)} is not tight packed, "
                           f"optimized order: " 
@@ -301,24 +646,66 @@ class Sottovuoto():
         if structs_count > 0:
             log.debug("=================== STRUCTS ANALYSIS =========================")
 
+        # the derived contract's storage starts where its bases' one ends
+        self.base_layout = self.get_base_layout()
+
+        # really simple contracts don't need a storage analysis
+        contract_needs_analysis = len(vars_in_contract) >= 3
+
+        # the structs and the contract are independent problems,
+        # let's solve them all at once
+        struct_solutions, contract_solution = self.solve_packing_problems(
+            vars_in_contract if contract_needs_analysis else None)
+
         # let's analyze the structs first
         (structs_are_tight_packed, opt_structs) = \
-            self.are_structs_packed()
+            self.are_structs_packed(struct_solutions)
 
-        # then we analyze the whole contract,
-        # but skip really simple ones
-        if len(vars_in_contract) < 3:
+        # then we analyze the whole contract
+        if not contract_needs_analysis:
             log.debug(f"too few variables: {self.contract.name}'s storage analysis was skipped.")
             return ((structs_are_tight_packed, opt_structs),
                 (0, None))
 
         log.debug("==================== CONTRACT ANALYSIS ======================")
         (contract_is_tight_packed, maybe_opt_slots_map) = \
-            self.are_tight_packed(vars_in_contract)
+            self.are_tight_packed(vars_in_contract, contract_solution,
+                                  self.base_layout)
+        self.add_finding(None, maybe_opt_slots_map)
+
+        if self.access_aware and contract_solution is not None:
+            # the access-aware order may save gas even when
+            # it doesn't spare any slot
+            _, access_slots_map = self.get_opt_slots_map(vars_in_contract,
+                                                         contract_solution)
+            self.gas_savings = self.estimate_gas_savings(access_slots_map)
+            if maybe_opt_slots_map is None and sum(self.gas_savings.values()) > 0:
+                maybe_opt_slots_map = access_slots_map
 
         return ((structs_are_tight_packed, opt_structs),
                 (contract_is_tight_packed, maybe_opt_slots_map))
 
+    def release(self):
+        """Drops the references to the slither objects of the analysis.
+
+        The findings and the gas savings are plain data, so they are kept.
+        """
+
+        if self.contract:
+            # remove the annotations added to the slither objects
+            for struct in self.contract.structures_declared:
+                if hasattr(struct, 'opt_version'):
+                    del struct.opt_version
+            for var in self.contract.state_variables_ordered:
+                if hasattr(var, 'is_inherited'):
+                    del var.is_inherited
+
+        self.contract = {}
+        self.storage = Storage()
+        self.variables = []
+        self.struct_layouts = {}
+        self.struct_solutions = {}
+
     def output(self, analysis_output, output_choice):
         """Outputs the results of the analysis.
 
@@ -341,10 +728,15 @@ class Sottovuoto():
                     for member in var.opt_version[slot]:
                         log.info(f"{member.type} {str(member)}")
 
-        if contract_is_tight_packed_or_count != 0:
-            log.info(f"{self.file} -> {self.contract.name}'s storage is not tight packed.")
-            log.info(f"{contract_is_tight_packed_or_count} slot(s) could be spared "
-                     "by declaring the state variables in this order:")
+        if contract_is_tight_packed_or_count != 0 or new_slots_map:
+            if contract_is_tight_packed_or_count != 0:
+                log.info(f"{self.file} -> {self.contract.name}'s storage is not tight packed.")
+                log.info(f"{contract_is_tight_packed_or_count} slot(s) could be spared "
+                         "by declaring the state variables in this order:")
+            else:
+                log.info(f"{self.file} -> {self.contract.name}'s storage is tight packed, "
+                         "but its functions would access less slots "
+                         "by declaring the state variables in this order:")
             for slot in new_slots_map:
                 log.debug(f"slot #{slot}: {new_slots_map[slot]}")
                 for var in new_slots_map[slot]:
@@ -353,4 +745,9 @@ class Sottovuoto():
         else:
             log.info(f"{self.contract.name}'s contract analysis: nothing to optimize!")
 
+        for function, gas_saved in self.gas_savings.items():
+            if gas_saved != 0:
+                log.info(f"{self.contract.name}.{function}: "
+                         f"~{gas_saved} gas saved per call (estimated)")
+
         log.debug("==============================================================")
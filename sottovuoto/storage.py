@@ -4,7 +4,7 @@ Storage provides the ability to create and edit solidity slots
 to calculate the amount of space taken up.
 
 Typical usage example:
-    self.storage = Storage()
+    self.storage = Storage(self.get_footprint)
     self.storage.get_slots_map(vars)
 
 """
@@ -16,6 +16,20 @@ SLOT_SPACE_IN_BYTES = 32
 
 log = logging.getLogger("sottovuoto")
 
+def get_inherited_bytes(bytes_left_in_slot):
+    """Checks whether a slot is partially filled by the base contracts.
+
+    Args:
+        bytes_left_in_slot: the bytes left in the last slot of the base contracts
+
+    Returns:
+        The bytes left, if the slot can be shared, or None
+    """
+
+    if 0 < bytes_left_in_slot < SLOT_SPACE_IN_BYTES:
+        return bytes_left_in_slot
+    return None
+
 class Storage():
     """It contains all the references to the current analysis.
 
@@ -23,14 +37,30 @@ class Storage():
         slots: the current slots map
         current_slot_id: an inline ref to the current slot id
         bytes_left_in_slot: an inline ref to the number of bytes left in the current slot
+        footprint: a callable returning the number of slots a struct or array
+            type takes up, or None to count a single slot for each of them
+        inherited_slot_id: the id of the slot shared with the base contracts, or None
+        inherited_bytes: the bytes left in the shared slot, or None
     """
 
-    def __init__(self):
-        """Initialize the instance, which is empty at the beginning."""
+    def __init__(self, footprint=None, current_slot_id=0,
+                 bytes_left_in_slot=SLOT_SPACE_IN_BYTES):
+        """Initialize the instance, which is empty at the beginning.
+
+        Args:
+            footprint: the callable sizing the structs and arrays
+            current_slot_id: the last slot used by the base contracts
+            bytes_left_in_slot: the bytes left in the last slot of the base contracts
+        """
 
         self.slots = {}
-        self.current_slot_id = 0
-        self.bytes_left_in_slot = SLOT_SPACE_IN_BYTES
+        self.current_slot_id = current_slot_id
+        self.bytes_left_in_slot = bytes_left_in_slot
+        self.footprint = footprint
+        self.inherited_bytes = get_inherited_bytes(bytes_left_in_slot)
+        self.inherited_slot_id = None
+        if self.inherited_bytes is not None:
+            self.inherited_slot_id = str(current_slot_id)
 
     def get_slots_map(self, vars):
         """Fills the slots with the provided variables.
@@ -46,7 +76,12 @@ class Storage():
             log.debug(f"{var} is a {var.type} and it is "
                       f"{var.type.storage_size[0]} bytes large")
 
-            if utils.is_struct(var):
+            if var.type.is_dynamic:
+                # mappings, dynamic arrays, strings and bytes
+                # take up a full slot of their own
+                log.debug(f"{var.type} is dynamic")
+                self.add_var_to_storage(var)
+            elif utils.is_struct(var):
                 log.debug(f"{var.type} is a struct")
                 self.add_struct_or_array_to_storage(var)
             elif utils.is_array(var):
@@ -57,32 +92,39 @@ class Storage():
 
         return self.slots
 
-    def start_new_slot(self):
-        """Starts a new storage slot"""
+    def count_slots(self):
+        """Counts the slots used, except the one shared with the base contracts.
 
-        self.current_slot_id += 1
-        self.slots[str(self.current_slot_id)] = []
-        self.bytes_left_in_slot = SLOT_SPACE_IN_BYTES
+        Returns:
+            The number of slots
+        """
+
+        return len([slot for slot in self.slots if slot != self.inherited_slot_id])
 
     def add_struct_or_array_to_storage(self, var):
-        """Adds a struct variable to the storage.
+        """Adds a struct or array variable to the storage.
 
         Args:
-            var: the elementary-type variable
+            var: the struct or array variable
         """
 
-        self.start_new_slot()
-        # init the new slot if necessary
-        if str(self.current_slot_id) not in self.slots:
-            self.slots[str(self.current_slot_id)] = []
+        footprint = self.footprint(var.type) if self.footprint else 1
 
-        self.slots[str(self.current_slot_id)].append(
+        # structs and arrays always start a new slot...
+        if self.bytes_left_in_slot < SLOT_SPACE_IN_BYTES:
+            self.current_slot_id += 1
+
+        self.slots[str(self.current_slot_id)] = [
             {"name": str(var),
             "type": str(var.type),
-        # we hardcode 32 because it is just a placeholder,
-        # all the structs and arrays will be moved to the end
-            "size": 32})
-        self.start_new_slot()
+            "size": footprint * SLOT_SPACE_IN_BYTES}]
+        # the rest of the slots it takes up
+        for _ in range(footprint - 1):
+            self.current_slot_id += 1
+            self.slots[str(self.current_slot_id)] = []
+
+        # ...and the next variable starts a new slot too
+        self.bytes_left_in_slot = 0
 
     def add_var_to_storage(self, var):
         """Adds a variable to the storage.
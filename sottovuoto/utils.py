@@ -18,8 +18,7 @@ def is_struct(var):
         Boolean
     """
 
-    return (isinstance(var.type, UserDefinedType) and \
-            isinstance(var.type.type, Structure))
+    return is_struct_type(var.type)
 
 def is_array(var):
     """Check whether a variable is an array.
@@ -31,4 +30,41 @@ def is_array(var):
         Boolean
     """
 
-    return isinstance(var.type, ArrayType)
+    return is_array_type(var.type)
+
+def is_constant(var):
+    """Check whether a state variable is a constant or an immutable.
+
+    Args:
+        var: the state variable to check
+
+    Returns:
+        Boolean
+    """
+
+    return var.is_constant or var.is_immutable
+
+def is_struct_type(var_type):
+    """Check whether a type is a struct.
+
+    Args:
+        var_type: the type to check
+
+    Returns:
+        Boolean
+    """
+
+    return (isinstance(var_type, UserDefinedType) and \
+            isinstance(var_type.type, Structure))
+
+def is_array_type(var_type):
+    """Check whether a type is an array.
+
+    Args:
+        var_type: the type to check
+
+    Returns:
+        Boolean
+    """
+
+    return isinstance(var_type, ArrayType)
@@ -0,0 +1,19 @@
+pragma solidity ^0.8.0;
+
+contract AccessPattern {
+
+    uint128 public a;
+    uint128 public b;
+    uint128 public c;
+    uint128 public d;
+
+    function setAC(uint128 newA, uint128 newC) public {
+        a = newA;
+        c = newC;
+    }
+
+    function setBD(uint128 newB, uint128 newD) public {
+        b = newB;
+        d = newD;
+    }
+}
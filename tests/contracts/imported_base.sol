@@ -0,0 +1,10 @@
+pragma solidity ^0.8.0;
+
+import "./imports/base.sol";
+
+contract DerivedImported is ImportedBase {
+
+    uint256 public a;
+    uint128 public c;
+    uint256 public d;
+}
@@ -0,0 +1,10 @@
+pragma solidity ^0.8.0;
+
+import "./imports/types.sol";
+
+contract ImportedStruct {
+
+    uint256 public x;
+    Types.Imported s;
+    uint256 public y;
+}
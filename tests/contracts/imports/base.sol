@@ -0,0 +1,9 @@
+pragma solidity ^0.8.0;
+
+import "./types.sol";
+
+contract ImportedBase {
+
+    Types.Imported s;
+    uint128 public x;
+}
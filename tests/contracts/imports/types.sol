@@ -0,0 +1,10 @@
+pragma solidity ^0.8.0;
+
+library Types {
+
+    struct Imported {
+        uint128 a;
+        uint256 b;
+        uint128 c;
+    }
+}
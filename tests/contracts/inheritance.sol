@@ -0,0 +1,13 @@
+pragma solidity ^0.8.0;
+
+contract Base {
+
+    uint128 public x;
+}
+
+contract Derived is Base {
+
+    uint256 public a;
+    uint128 public c;
+    uint256 public d;
+}
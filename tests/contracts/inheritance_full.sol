@@ -0,0 +1,13 @@
+pragma solidity ^0.8.0;
+
+contract Base {
+
+    uint128 public x;
+}
+
+contract DerivedFull is Base {
+
+    uint256 public a;
+    uint256 public b;
+    uint256 public d;
+}
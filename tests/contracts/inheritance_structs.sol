@@ -0,0 +1,18 @@
+pragma solidity ^0.8.0;
+
+contract Base {
+
+    uint128 public x;
+}
+
+contract DerivedStructs is Base {
+
+    struct Pair {
+        uint256 left;
+        uint256 right;
+    }
+
+    Pair private first;
+    Pair private second;
+    Pair private third;
+}
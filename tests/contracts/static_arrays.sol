@@ -0,0 +1,15 @@
+pragma solidity ^0.8.0;
+
+contract StaticArrays {
+
+    struct Inner {
+        uint128 x;
+        uint256 y;
+        uint128 z;
+    }
+
+    uint128 public a;
+    uint8[40] private small;
+    Inner[2] private inners;
+    uint128 public b;
+}
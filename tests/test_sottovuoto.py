@@ -256,4 +256,377 @@ def test_nested_mapping():
     sv = Sottovuoto(contract_path)
     ((_, _),
      (spareable_storage_slots, _)) = sv.analyze_packing()
-    assert spareable_storage_slots == 1
\ No newline at end of file
+    assert spareable_storage_slots == 1
+
+"""
+parallel solving
+
+the structs and the contract problems of nested_expensive_struct.sol
+solved on a pool of workers must give the same results as the
+sequential analysis
+"""
+def test_parallel_solving():
+    contract_path = "tests/contracts/nested_expensive_struct.sol"
+    sequential = Sottovuoto(contract_path).analyze_packing()
+    parallel = Sottovuoto(contract_path, jobs=4).analyze_packing()
+    ((sequential_structs_slots, sequential_vars),
+     (sequential_storage_slots, sequential_slots_map)) = sequential
+    ((parallel_structs_slots, parallel_vars),
+     (parallel_storage_slots, parallel_slots_map)) = parallel
+    assert parallel_structs_slots == sequential_structs_slots
+    assert [str(var) for var in parallel_vars] == \
+        [str(var) for var in sequential_vars]
+    assert parallel_storage_slots == sequential_storage_slots
+    assert len(parallel_slots_map) == len(sequential_slots_map)
+
+
+"""
+results store
+
+the findings of doc_expensive.sol are recorded and the file
+is recognized as unchanged afterwards
+"""
+def test_results_store(tmp_path):
+    from sottovuoto.results import ResultsStore, file_hash
+    contract_path = "tests/contracts/doc_expensive.sol"
+    sv = Sottovuoto(contract_path)
+    sv.analyze_packing()
+    store = ResultsStore(str(tmp_path / "sottovuoto.db"))
+    content_hash = file_hash(contract_path)
+    assert not store.is_unchanged(contract_path, content_hash)
+    store.record(contract_path, content_hash, sv.findings, 1.5)
+    assert store.is_unchanged(contract_path, content_hash)
+    assert store.get_latest_record(contract_path) == {"findings": sv.findings,
+                                                      "duration": 1.5}
+    assert not store.is_unchanged(contract_path, "changed")
+    assert not store.is_unchanged(contract_path, content_hash, {"access_aware": True})
+    findings = store.contracts_with_spareable_slots(1)
+    assert len(findings) == 1
+    assert findings[0]["struct"] is None
+    assert findings[0]["current_slots"] - findings[0]["optimal_slots"] == 1
+    assert store.contracts_with_spareable_slots(2) == []
+    base_path = tmp_path / "base.sol"
+    base_path.write_text("contract Base {}")
+    store.record(contract_path, content_hash, sv.findings,
+                 dependencies={str(base_path): file_hash(base_path)})
+    assert store.is_unchanged(contract_path, content_hash)
+    base_path.write_text("contract Base { uint256 a; }")
+    assert not store.is_unchanged(contract_path, content_hash)
+    store.close()
+
+
+"""
+imported_struct.sol
+
+the struct comes from imports/types.sol, which is recorded
+along with the analysis so its changes are detected
+"""
+def test_imported_dependencies():
+    sv = Sottovuoto("tests/contracts/imported_struct.sol")
+    sv.analyze_packing()
+    imported = str(Path("tests/contracts/imports/types.sol").resolve())
+    assert sv.file_hashes[imported] is not None
+
+
+"""
+imported_base.sol
+
+ImportedBase (imports/base.sol) declares a struct from imports/types.sol:
+editing types.sol must invalidate its memoized layout
+"""
+def test_imported_base_layout():
+    sv = Sottovuoto("tests/contracts/imported_base.sol")
+    sv.analyze_packing()
+    base = sv.contract.inheritance[0]
+    imported = str(Path("tests/contracts/imports/types.sol").resolve())
+    (_, _, name, imports) = sv.get_contract_key(base)
+    assert name == "ImportedBase"
+    assert [imported_file for imported_file, _ in imports] == [imported]
+
+
+"""
+access_pattern.sol
+
+uint128 public a;
+uint128 public b;
+uint128 public c;
+uint128 public d;
+
+setAC() writes a and c, setBD() writes b and d:
+the storage is tight packed, but each function writes two slots
+"""
+def test_access_pattern():
+    contract_path = "tests/contracts/access_pattern.sol"
+    sv = Sottovuoto(contract_path, access_aware=True)
+    ((_, _),
+     (spareable_storage_slots, new_slots_map)) = sv.analyze_packing()
+    assert spareable_storage_slots == 0
+    assert len(new_slots_map) == 2
+    assert sorted(sorted(str(var) for var in new_slots_map[slot])
+                  for slot in new_slots_map) == [["a", "c"], ["b", "d"]]
+    assert sv.gas_savings["setAC(uint128,uint128)"] == 5000
+    assert sv.gas_savings["setBD(uint128,uint128)"] == 5000
+
+
+"""
+benchmark
+
+the suggested layouts are written back at the original declarations
+positions, and setAC() of access_pattern.sol gets cheaper once
+a and c share a slot
+"""
+def test_rewrite_source():
+    from sottovuoto.benchmark import get_reorders, rewrite_source
+    contract_path = "tests/contracts/doc_expensive.sol"
+    sv = Sottovuoto(contract_path)
+    source = rewrite_source(contract_path, get_reorders(sv.analyze_packing())).decode()
+    declarations = [source.index(f"public {name}") for name in ("a", "b", "c")]
+    # b is the only 32 bytes variable, it can't be between a and c anymore
+    assert not declarations[0] < declarations[1] < declarations[2]
+    assert len(source) == len(Path(contract_path).read_text())
+    # the struct members are left in place, for their positional constructors
+    sv = Sottovuoto("tests/contracts/expensive_struct.sol")
+    assert get_reorders(sv.analyze_packing()) == []
+
+def test_benchmark():
+    pytest.importorskip("web3")
+    pytest.importorskip("eth_tester")
+    from sottovuoto.benchmark import benchmark
+    contract_path = "tests/contracts/access_pattern.sol"
+    sv = Sottovuoto(contract_path, access_aware=True)
+    gas_report = benchmark(sv, sv.analyze_packing())
+    original = gas_report["original"]["functions"]["setAC(uint128,uint128)"]
+    optimized = gas_report["optimized"]["functions"]["setAC(uint128,uint128)"]
+    assert optimized < original
+
+
+"""
+static_arrays.sol
+
+struct Inner {
+    uint128 x;
+    uint256 y;
+    uint128 z;
+}
+
+uint128 public a;
+uint8[40] private small; // 2 slots
+Inner[2] private inners; // 2 * 3 slots, 2 * 2 once Inner is optimized
+uint128 public b;
+
+the contract's own order spares 1 slot, and reordering Inner
+spares 2 more: the findings count both
+"""
+def test_static_arrays():
+    contract_path = "tests/contracts/static_arrays.sol"
+    sv = Sottovuoto(contract_path)
+    ((spareable_structs_slots, _),
+     (spareable_storage_slots, _)) = sv.analyze_packing()
+    assert spareable_structs_slots == 1
+    assert spareable_storage_slots == 1
+    contract_finding = sv.findings[-1]
+    assert contract_finding["struct"] is None
+    assert contract_finding["current_slots"] == 10
+    assert contract_finding["optimal_slots"] == 7
+
+
+"""
+inheritance.sol
+
+contract Base {
+    uint128 public x;
+}
+
+contract Derived is Base {
+    uint256 public a;
+    uint128 public c; // fits in the slot of x
+    uint256 public d;
+}
+"""
+def test_inheritance():
+    contract_path = "tests/contracts/inheritance.sol"
+    layout_cache = {}
+    sv = Sottovuoto(contract_path, layout_cache=layout_cache)
+    ((_, _),
+     (spareable_storage_slots, new_slots_map)) = sv.analyze_packing()
+    assert sv.contract.name == "Derived"
+    assert sv.base_layout == (0, 16)
+    assert spareable_storage_slots == 1
+    assert [str(var) for var in new_slots_map[0]] == ["c"]
+    # the base layout is reused by the next analysis
+    assert len(layout_cache) == 1
+    sv = Sottovuoto(contract_path, layout_cache=layout_cache)
+    sv.analyze_packing()
+    assert len(layout_cache) == 1
+
+
+"""
+batch mode
+
+the files are analyzed on recycled workers and their
+findings are returned in order
+"""
+def test_batch():
+    from sottovuoto.batch import run_batch
+    files = ["tests/contracts/doc_expensive.sol",
+             "tests/contracts/doc_cheap.sol",
+             "tests/contracts/expensive_struct.sol"]
+    options = {"jobs": 1, "access_aware": False, "benchmark": False}
+    records = list(run_batch(files, options, max_files=1))
+    assert [file for file, _ in records] == files
+    assert records[0][1]["findings"][-1]["optimal_slots"] == 2
+
+
+"""
+sharding
+
+the partition is deterministic, balanced by cost and
+the merged shard reports contain every file once
+"""
+def test_sharding(tmp_path):
+    from sottovuoto import sharding
+    files = sorted(str(file) for file in Path("tests/contracts").glob("*.sol"))
+    costs = {file: index + 1 for index, file in enumerate(files)}
+    shards = sharding.partition(files, costs, 3)
+    assert shards == sharding.partition(list(reversed(files)), costs, 3)
+    assert sorted(file for shard in shards for file in shard) == files
+    loads = [sum(costs[file] for file in shard) for shard in shards]
+    assert max(loads) - min(loads) <= max(costs.values())
+
+    sizes = sharding.get_costs(files, {files[0]: 2.0})
+    assert sizes[files[0]] == 2.0
+
+    for index, shard in enumerate(shards, 1):
+        records = [(file, {"duration": costs[file], "findings": []})
+                   for file in shard]
+        sharding.write_report(tmp_path / f"shard-{index}.json",
+                              sharding.make_report(records, f"{index}/3"))
+    merged = sharding.merge_reports(sorted(tmp_path.glob("shard-*.json")))
+    assert merged["shards"] == ["1/3", "2/3", "3/3"]
+    assert [file["path"] for file in merged["files"]] == files
+    sharding.write_report(tmp_path / "merged.json", merged)
+    assert sharding.read_durations(tmp_path / "merged.json") == costs
+    # a missing shard
+    with pytest.raises(ValueError):
+        sharding.merge_reports(sorted(tmp_path.glob("shard-*.json"))[1:])
+
+    # only the nested struct can be improved
+    sharding.output_report({"shards": [], "files": [
+        {"path": files[0], "duration": 1, "findings": [
+            {"contract": "C", "struct": None, "current_slots": 10,
+             "optimal_slots": 7, "suggested_order": None}]}]})
+
+
+def test_layout_cache():
+    from sottovuoto.batch import LayoutCache
+    cache = LayoutCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
+
+
+"""
+resident server
+
+a client gets the findings of doc_expensive.sol, sent
+both by path and as source text
+"""
+def test_server(tmp_path):
+    import threading
+    from sottovuoto.server import AnalysisServer
+    from sottovuoto.client import request
+    socket_path = str(tmp_path / "sottovuoto.sock")
+    options = {"jobs": 1, "access_aware": False, "benchmark": False}
+    server = AnalysisServer(socket_path, options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        contract_path = str(Path("tests/contracts/doc_expensive.sol").resolve())
+        by_path = request(socket_path, {"path": contract_path})
+        by_source = request(socket_path, {"path": contract_path,
+                                          "source": Path(contract_path).read_text()})
+        for response in (by_path, by_source):
+            assert response["path"] == contract_path
+            assert response["findings"][-1]["optimal_slots"] == 2
+        assert "error" in request(socket_path, {"path": "missing.sol"})
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+"""
+inheritance_full.sol
+
+contract Base {
+    uint128 public x;
+}
+
+contract DerivedFull is Base {
+    uint256 public a; // nothing fits in the slot of x
+    uint256 public b;
+    uint256 public d;
+}
+"""
+def test_inheritance_full():
+    contract_path = "tests/contracts/inheritance_full.sol"
+    sv = Sottovuoto(contract_path)
+    ((_, _),
+     (spareable_storage_slots, new_slots_map)) = sv.analyze_packing()
+    assert sv.base_layout == (0, 16)
+    assert spareable_storage_slots == 0
+    assert new_slots_map is None
+    assert sv.findings[-1]["current_slots"] == 3
+    assert sv.findings[-1]["optimal_slots"] == 3
+
+
+"""
+inheritance_dynamic.sol
+
+contract Base {
+    uint128 public x;
+    string public name; // closes the slot of x
+}
+
+contract DerivedDynamic is Base {
+    uint256 public a;
+    uint128 public c;
+    uint256 public d;
+}
+"""
+def test_inheritance_dynamic():
+    contract_path = "tests/contracts/inheritance_dynamic.sol"
+    sv = Sottovuoto(contract_path)
+    ((_, _),
+     (spareable_storage_slots, new_slots_map)) = sv.analyze_packing()
+    assert sv.base_layout == (1, 0)
+    assert spareable_storage_slots == 0
+    assert new_slots_map is None
+
+
+"""
+inheritance_structs.sol
+
+contract Base {
+    uint128 public x;
+}
+
+contract DerivedStructs is Base {
+    struct Pair {
+        uint256 left;
+        uint256 right;
+    }
+
+    Pair private first; // structs can't share the slot of x
+    Pair private second;
+    Pair private third;
+}
+"""
+def test_inheritance_structs():
+    contract_path = "tests/contracts/inheritance_structs.sol"
+    sv = Sottovuoto(contract_path)
+    ((_, _),
+     (spareable_storage_slots, _)) = sv.analyze_packing()
+    assert spareable_storage_slots == 0
+    assert sv.findings[-1]["current_slots"] == 6
+    assert sv.findings[-1]["optimal_slots"] == 6